@@ -7,63 +7,167 @@ management via xcrun simctl commands.
 """
 
 import asyncio
+import base64
 import json
-import subprocess
-import sys
-import os
-import tempfile
-import re
+import shutil
+import time
 from typing import Any, Dict, List, Optional, Union
-from dataclasses import dataclass
 
 from mcp.server.fastmcp import FastMCP
 
+# orjson parses/serializes the large simctl JSON payloads several times
+# faster than stdlib json; fall back transparently when it isn't installed.
+try:
+    import orjson
 
-@dataclass
-class SimulatorDevice:
-    """Represents a simulator device"""
-    name: str
-    udid: str
-    state: str
-    runtime: str
-    device_type: str
+    def _json_loads(data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+    def _json_dumps(obj: Any, indent: bool = False) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+
+except ImportError:
+    def _json_loads(data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def _json_dumps(obj: Any, indent: bool = False) -> str:
+        return json.dumps(obj, indent=2 if indent else None)
 
 
 # Initialize the MCP server
 mcp = FastMCP("SimCtl MCP Server")
 
 
+# Cached output of `simctl list devices`, keyed by (format, filter).
+# Listing devices is the slowest simctl call and MCP clients tend to issue
+# it repeatedly, so recent results are served from memory for a short window.
+_LIST_CACHE_TTL = 3.0
+_list_cache: Dict[tuple, tuple[float, Any]] = {}
+
+
+def _invalidate_list_cache() -> None:
+    """Drop cached device lists after a state-changing simctl call"""
+    _list_cache.clear()
+
+
+def _runtime_display_name(runtime: str) -> str:
+    """Derive a display name like 'iOS 17.0' from a SimRuntime identifier"""
+    suffix = runtime.rsplit(".", 1)[-1]
+    platform, _, version = suffix.partition("-")
+    return f"{platform} {version.replace('-', '.')}" if version else platform
+
+
+def _filter_devices(data: Dict[str, Any], filter: str) -> Dict[str, Any]:
+    """Apply simctl-style substring filtering to a parsed device list"""
+    needle = filter.lower()
+
+    if needle == "available":
+        devices = {
+            runtime: [d for d in ds if d.get("isAvailable")]
+            for runtime, ds in data.get("devices", {}).items()
+        }
+    else:
+        devices = {}
+        for runtime, ds in data.get("devices", {}).items():
+            # A runtime match ('iOS 17', identifier, …) keeps the whole
+            # section, mirroring simctl's own filter behavior
+            if needle in runtime.lower() or needle in _runtime_display_name(runtime).lower():
+                devices[runtime] = ds
+            else:
+                devices[runtime] = [
+                    d for d in ds
+                    if needle in d.get("name", "").lower()
+                    or needle in d.get("udid", "").lower()
+                    or needle in d.get("state", "").lower()
+                ]
+
+    return {"devices": devices}
+
+
 class SimCtlMCPError(Exception):
     """Base exception for SimCtl MCP operations"""
+    __slots__ = ("message", "code")
+
     def __init__(self, message: str, code: Optional[str] = None):
         self.message = message
         self.code = code
         super().__init__(self.message)
 
 
-async def run_simctl_command(args: List[str]) -> str:
-    """Run a simctl command and return the output"""
-    cmd = ["xcrun", "simctl"] + args
-    
+# Absolute path to xcrun, resolved once at import so each subprocess spawn
+# skips the PATH search. None means xcrun is missing and calls fail fast.
+_XCRUN_PATH = shutil.which("xcrun")
+
+# Bound concurrent simctl subprocesses so batched operations don't
+# fork-storm CoreSimulator.
+_SIMCTL_CONCURRENCY = asyncio.Semaphore(8)
+
+# Maps simctl_launch_app console_mode values to their simctl flags
+_CONSOLE_MODE_FLAGS = {"console": "--console", "console-pty": "--console-pty"}
+
+
+async def _read_stream(stream: asyncio.StreamReader) -> bytes:
+    """Read a subprocess stream to EOF in fixed-size chunks"""
+    buf = bytearray()
+    while chunk := await stream.read(65536):
+        buf += chunk
+    return bytes(buf)
+
+
+async def run_simctl_binary(args: List[str], input: Optional[bytes] = None) -> bytes:
+    """Run a simctl command and return its raw stdout bytes"""
+    if _XCRUN_PATH is None:
+        raise SimCtlMCPError("xcrun simctl not found. Make sure Xcode is installed.")
+
     try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
+        # The semaphore bounds the spawn burst only; holding a permit for the
+        # command's full duration would let long-running commands such as
+        # recordVideo pin permits and eventually starve every simctl call
+        async with _SIMCTL_CONCURRENCY:
+            # close_fds=False keeps CPython on the fast posix_spawn path and
+            # skips the close-every-fd loop; xcrun gets no sensitive fds.
+            process = await asyncio.create_subprocess_exec(
+                _XCRUN_PATH, "simctl", *args,
+                stdin=asyncio.subprocess.PIPE if input is not None else None,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                close_fds=False
+            )
+
+        if input is not None:
+            process.stdin.write(input)
+            process.stdin.close()
+
+        # Drain both pipes concurrently in 64KB chunks so large device
+        # lists stream into one buffer and neither pipe can fill up
+        stdout, stderr = await asyncio.gather(
+            _read_stream(process.stdout),
+            _read_stream(process.stderr),
         )
-        
-        stdout, stderr = await process.communicate()
-        
+        await process.wait()
+
         if process.returncode != 0:
-            error_msg = stderr.decode().strip() if stderr else "Command failed"
+            error_msg = stderr.rstrip().decode("utf-8", "replace") if stderr else "Command failed"
             raise SimCtlMCPError(f"simctl command failed: {error_msg}")
-        
-        return stdout.decode().strip()
-    
+
+        return stdout
+
     except FileNotFoundError:
         raise SimCtlMCPError("xcrun simctl not found. Make sure Xcode is installed.")
 
 
+async def run_simctl_command(args: List[str], input: Optional[bytes] = None) -> str:
+    """Run a simctl command and return the output"""
+    stdout = await run_simctl_binary(args, input)
+    # Trim while still bytes so only one str is materialized per call
+    return stdout.rstrip().decode("utf-8", "replace")
+
+
+async def run_simctl_many(arg_lists: List[List[str]]) -> List[str]:
+    """Run several simctl commands concurrently and return their outputs"""
+    return list(await asyncio.gather(*(run_simctl_command(args) for args in arg_lists)))
+
+
 # MCP Tools for iOS Simulator management
 
 @mcp.tool()
@@ -78,26 +182,41 @@ async def simctl_list_devices(format: str = "json", filter: Optional[str] = None
     Returns:
         List of available simulators
     """
-    cmd_args = ["list"]
-    
     if format == "json":
-        cmd_args.extend(["-j"])
-    
-    cmd_args.append("devices")
-    
+        # Fetch the unfiltered list once and satisfy every filtered variant
+        # from the parsed dict; simctl pays the same enumeration cost either
+        # way, so re-spawning it per filter term buys nothing.
+        cache_key = ("json",)
+        cached = _list_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < _LIST_CACHE_TTL:
+            data = cached[1]
+        else:
+            # Parse straight from bytes; orjson then skips the UTF-8 decode
+            # and no intermediate str of the full payload is ever built
+            raw = await run_simctl_binary(["list", "-j", "devices"])
+            try:
+                data = _json_loads(raw)
+            except ValueError:
+                return raw.rstrip().decode("utf-8", "replace")
+            _list_cache[cache_key] = (time.monotonic(), data)
+
+        if filter:
+            data = _filter_devices(data, filter)
+
+        return _json_dumps(data, indent=True)
+
+    cache_key = ("text", filter)
+    cached = _list_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < _LIST_CACHE_TTL:
+        return cached[1]
+
+    cmd_args = ["list", "devices"]
+
     if filter:
         cmd_args.append(filter)
-    
+
     result = await run_simctl_command(cmd_args)
-    
-    if format == "json":
-        # Parse and format JSON for better readability
-        try:
-            data = json.loads(result)
-            return json.dumps(data, indent=2)
-        except json.JSONDecodeError:
-            return result
-    
+    _list_cache[cache_key] = (time.monotonic(), result)
     return result
 
 
@@ -119,9 +238,30 @@ async def simctl_boot_device(device: str, arch: Optional[str] = None) -> str:
         cmd_args.append(f"--arch={arch}")
     
     await run_simctl_command(cmd_args)
+    _invalidate_list_cache()
     return f"Successfully booted device: {device}"
 
 
+@mcp.tool()
+async def simctl_boot_devices(devices: List[str]) -> str:
+    """
+    Boot several simulator devices concurrently.
+
+    Args:
+        devices: List of device UDIDs or names to boot
+
+    Returns:
+        Success message
+    """
+    try:
+        await run_simctl_many([["boot", device] for device in devices])
+    finally:
+        # Some devices may have booted even if the batch failed partway,
+        # so the cached pre-boot list is stale either way
+        _invalidate_list_cache()
+    return f"Successfully booted devices: {', '.join(devices)}"
+
+
 @mcp.tool()
 async def simctl_shutdown_device(device: str) -> str:
     """
@@ -135,6 +275,7 @@ async def simctl_shutdown_device(device: str) -> str:
     """
     cmd_args = ["shutdown", device]
     await run_simctl_command(cmd_args)
+    _invalidate_list_cache()
     return f"Successfully shutdown device: {device}"
 
 
@@ -157,6 +298,7 @@ async def simctl_create_device(name: str, device_type: str, runtime: Optional[st
         cmd_args.append(runtime)
     
     result = await run_simctl_command(cmd_args)
+    _invalidate_list_cache()
     return f"Created device '{name}': {result}"
 
 
@@ -173,6 +315,7 @@ async def simctl_delete_device(devices: List[str]) -> str:
     """
     cmd_args = ["delete"] + devices
     await run_simctl_command(cmd_args)
+    _invalidate_list_cache()
     return f"Successfully deleted devices: {', '.join(devices)}"
 
 
@@ -210,15 +353,14 @@ async def simctl_launch_app(device: str, bundle_id: str, wait_for_debugger: bool
         Launch result
     """
     cmd_args = ["launch"]
-    
+
     if wait_for_debugger:
         cmd_args.append("--wait-for-debugger")
-    
-    if console_mode == "console":
-        cmd_args.append("--console")
-    elif console_mode == "console-pty":
-        cmd_args.append("--console-pty")
-    
+
+    console_flag = _CONSOLE_MODE_FLAGS.get(console_mode)
+    if console_flag:
+        cmd_args.append(console_flag)
+
     cmd_args.extend([device, bundle_id])
     
     if args:
@@ -253,23 +395,29 @@ async def simctl_screenshot(device: str, output_path: str, format: str = "png",
     
     Args:
         device: Device UDID, name, or 'booted' for current device
-        output_path: Path where to save the screenshot
+        output_path: Path where to save the screenshot, or '-' to return the image as base64
         format: Image format (png, jpeg)
         display: Display to capture (internal, external)
-        
+
     Returns:
-        Success message
+        Success message, or the base64-encoded image when output_path is '-'
     """
     cmd_args = ["io", device, "screenshot"]
-    
+
     if format != "png":
         cmd_args.append(f"--type={format}")
-    
+
     if display != "internal":
         cmd_args.append(f"--display={display}")
-    
+
     cmd_args.append(output_path)
-    
+
+    if output_path == "-":
+        # simctl writes the raw image to stdout; keep it as bytes so the
+        # UTF-8 decode in run_simctl_command can't corrupt it
+        image = await run_simctl_binary(cmd_args)
+        return base64.b64encode(image).decode()
+
     await run_simctl_command(cmd_args)
     return f"Screenshot saved to {output_path}"
 
@@ -319,24 +467,17 @@ async def simctl_push_notification(device: str, payload: Dict[str, Any],
     Returns:
         Success message
     """
-    # Create temporary file for payload
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-        json.dump(payload, f)
-        payload_file = f.name
-    
-    try:
-        cmd_args = ["push", device]
-        
-        if bundle_id:
-            cmd_args.append(bundle_id)
-        
-        cmd_args.append(payload_file)
-        
-        await run_simctl_command(cmd_args)
-        return f"Push notification sent to {bundle_id or 'app specified in payload'}"
-    
-    finally:
-        os.unlink(payload_file)
+    cmd_args = ["push", device]
+
+    if bundle_id:
+        cmd_args.append(bundle_id)
+
+    # simctl reads the payload from stdin when given '-', so the JSON is
+    # streamed straight to the subprocess without a temp-file round-trip
+    cmd_args.append("-")
+
+    await run_simctl_command(cmd_args, input=_json_dumps(payload).encode())
+    return f"Push notification sent to {bundle_id or 'app specified in payload'}"
 
 
 @mcp.tool()
@@ -418,20 +559,18 @@ async def simctl_status_bar_override(device: str, action: str, time: Optional[st
         Success message
     """
     cmd_args = ["status_bar", device, action]
-    
+
     if action == "override":
-        if time:
-            cmd_args.extend(["--time", time])
-        if data_network:
-            cmd_args.extend(["--dataNetwork", data_network])
-        if wifi_bars is not None:
-            cmd_args.extend(["--wifiBars", str(wifi_bars)])
-        if cellular_bars is not None:
-            cmd_args.extend(["--cellularBars", str(cellular_bars)])
-        if battery_level is not None:
-            cmd_args.extend(["--batteryLevel", str(battery_level)])
-        if battery_state:
-            cmd_args.extend(["--batteryState", battery_state])
+        for flag, value in (
+            ("--time", time),
+            ("--dataNetwork", data_network),
+            ("--wifiBars", wifi_bars),
+            ("--cellularBars", cellular_bars),
+            ("--batteryLevel", battery_level),
+            ("--batteryState", battery_state),
+        ):
+            if value is not None:
+                cmd_args.extend((flag, str(value)))
     
     result = await run_simctl_command(cmd_args)
     return result if result else f"Status bar {action} completed"
@@ -450,18 +589,67 @@ async def simctl_ui_appearance(device: str, appearance: Optional[str] = None) ->
         Current or updated appearance
     """
     cmd_args = ["ui", device, "appearance"]
-    
+
     if appearance:
         cmd_args.append(appearance)
-    
+
     result = await run_simctl_command(cmd_args)
     return result
 
 
+@mcp.tool()
+async def simctl_device_state(device: str) -> str:
+    """
+    Get UI appearance, status bar overrides, and location state for a device.
+
+    Args:
+        device: Device UDID, name, or 'booted' for current device
+
+    Returns:
+        JSON object with appearance, status_bar, and location fields
+    """
+    # The three read-only queries are independent, so run them concurrently
+    # and pay one subprocess round-trip of latency instead of three
+    appearance, status_bar, location = await asyncio.gather(
+        run_simctl_command(["ui", device, "appearance"]),
+        run_simctl_command(["status_bar", device, "list"]),
+        run_simctl_command(["location", device, "list"]),
+    )
+
+    return _json_dumps(
+        {"appearance": appearance, "status_bar": status_bar, "location": location},
+        indent=True,
+    )
+
+
+# FastMCP rebuilds the tool list (including schema conversion) on every
+# tools/list request, but the registered tools never change after import.
+# Build the list once and serve the cached copy to reconnecting clients.
+_tools_cache: Optional[List[Any]] = None
+
+
+async def _list_tools_cached() -> List[Any]:
+    global _tools_cache
+    if _tools_cache is None:
+        _tools_cache = await mcp.list_tools()
+    return _tools_cache
+
+
+mcp._mcp_server.list_tools()(_list_tools_cached)
+
+
 def cli():
     """CLI entry point for package installation"""
+    # uvloop's libuv-backed loop has noticeably lower subprocess/pipe
+    # overhead than the default loop, which is this server's whole workload
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     mcp.run()
 
 
 if __name__ == "__main__":
-    mcp.run()
+    cli()